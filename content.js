@@ -1,18 +1,155 @@
 // Content script for Kahoot Agent Chrome Extension
 // This runs directly on the Kahoot page and can access the DOM
 
+// Query cleanup patterns, compiled once per page load
+const TRAILING_PUNCTUATION = /[?!.]+$/;
+const LEADING_QUESTION_WORD = /^(what|which|who|where|when|how|why)\s+/i;
+const WHITESPACE_RUN = /\s+/g;
+
+// Search API hosts, preconnected when a question appears so its search
+// skips DNS/TLS setup
+const SEARCH_ORIGINS = [
+    'https://en.wikipedia.org',
+    'https://api.duckduckgo.com'
+];
+
+// Give up on a search API after this long so one stalled host can't hold up a question
+const SEARCH_TIMEOUT_MS = 5000;
+
+// Search results shared by every agent on the page, keyed by cleaned query.
+// Holds promises so concurrent lookups for one query share a request.
+const SEARCH_CACHE_SIZE = 256;
+const searchCache = new Map();
+
+// Final answers keyed by question plus its options, so re-asked questions
+// skip scoring and search entirely
+const ANSWER_CACHE_SIZE = 128;
+const answerCache = new Map();
+
+function answerCacheKey(question, answers) {
+    return `${question}\u0000${answers.join('\u0001')}`;
+}
+
+// Selectors for the question title across Kahoot layouts, most specific first
+const QUESTION_SELECTORS = [
+    '[data-functional-selector="block-title"]',
+    '[data-testid="question-title"]',
+    '.question-title',
+    '.question-text',
+    '[class*="question"]',
+    '[class*="title"]',
+    '[class*="block-title"]',
+    '[class*="Question"]',
+    'h1', 'h2', 'h3'
+];
+
+// Selectors for answer option elements, most specific first
+const ANSWER_SELECTORS = [
+    '[data-functional-selector="answer-option"]',
+    '[data-testid="answer"]',
+    '.answer-option',
+    '.option-text',
+    '[class*="answer"]',
+    '[class*="option"]',
+    'button[class*="answer"]',
+    'button[class*="choice"]',
+    '[role="button"]'
+];
+
+// Toast styling shared by every notification
+const NOTIFICATION_STYLE = `
+    position: fixed;
+    top: 20px;
+    right: 20px;
+    padding: 12px 20px;
+    border-radius: 8px;
+    color: white;
+    font-weight: bold;
+    z-index: 10000;
+    font-family: Arial, sans-serif;
+    font-size: 14px;
+    max-width: 300px;
+    box-shadow: 0 4px 12px rgba(0,0,0,0.3);
+    transition: all 0.3s ease;
+`;
+
+const NOTIFICATION_COLORS = {
+    success: '#4CAF50',
+    error: '#f44336',
+    warning: '#ff9800',
+    info: '#2196F3'
+};
+
+// Enhanced knowledge base with question patterns and correct answers
+const KNOWLEDGE_BASE = [
+    // Dinosaur questions
+    {
+        patterns: ['dinosaur means', 'word dinosaur'],
+        correctAnswer: 'terrible lizard',
+        confidence: 0.95,
+        explanation: 'Dinosaur comes from Greek meaning "terrible lizard"'
+    },
+    {
+        patterns: ['dinosaurs first appear', 'dinosaurs appear', 'period did dinosaurs'],
+        correctAnswer: 'triassic period',
+        confidence: 0.95,
+        explanation: 'Dinosaurs first appeared in the Triassic Period'
+    },
+
+    // Geography
+    {
+        patterns: ['capital france', 'france capital'],
+        correctAnswer: 'paris',
+        confidence: 0.95
+    },
+    {
+        patterns: ['capital italy', 'italy capital'],
+        correctAnswer: 'rome',
+        confidence: 0.95
+    },
+
+    // Math
+    {
+        patterns: ['2+2', 'two plus two'],
+        correctAnswer: 'four',
+        confidence: 0.95
+    },
+    {
+        patterns: ['3+3', 'three plus three'],
+        correctAnswer: 'six',
+        confidence: 0.95
+    },
+
+    // Science
+    {
+        patterns: ['speed of light'],
+        correctAnswer: '299,792,458',
+        confidence: 0.9
+    },
+
+    // History
+    {
+        patterns: ['world war 2', 'ww2', 'second world war'],
+        correctAnswer: '1939',
+        confidence: 0.9
+    }
+];
+
 class KahootAgent {
     constructor(config = {}) {
         this.config = {
             autoClick: config.autoClick || false,
             continuous: config.continuous || false,
             confidence: config.confidence || 0.7,
+            debug: config.debug || false,
             searchDelay: 2000,
+            clickDelay: 500,
             ...config
         };
 
         this.isRunning = false;
         this.observer = null;
+        this.pendingCheck = null;
         this.lastQuestion = '';
         this.questionCount = 0;
 
@@ -42,10 +179,38 @@ class KahootAgent {
             this.observer = null;
         }
 
+        if (this.pendingCheck !== null) {
+            clearTimeout(this.pendingCheck);
+            this.pendingCheck = null;
+        }
+
         console.log('Kahoot Agent stopped');
         this.showNotification('Kahoot Agent stopped', 'info');
     }
 
+    warmConnections() {
+        // Chrome drops idle preconnected sockets after about ten seconds, so
+        // replace the hints for each question instead of adding them once
+        document.head.querySelectorAll('link[data-kahoot-agent-preconnect]').forEach(link => link.remove());
+
+        for (let origin of SEARCH_ORIGINS) {
+            const link = document.createElement('link');
+            link.dataset.kahootAgentPreconnect = '';
+            link.rel = 'preconnect';
+            link.href = origin;
+            link.crossOrigin = 'anonymous';
+            document.head.appendChild(link);
+        }
+    }
+
+    debugLog(...args) {
+        // Extraction runs on every DOM change in continuous mode; keep its
+        // per-selector tracing out of the console unless asked for
+        if (this.config.debug) {
+            console.log(...args);
+        }
+    }
+
     updateConfig(newConfig) {
         this.config = { ...this.config, ...newConfig };
     }
@@ -53,10 +218,15 @@ class KahootAgent {
     startContinuousMonitoring() {
         // Monitor for question changes using MutationObserver
         this.observer = new MutationObserver((mutations) => {
-            for (let mutation of mutations) {
-                if (mutation.type === 'childList' || mutation.type === 'attributes') {
+            // Kahoot's animations deliver many batches back to back; merge them
+            // into one check. A timer rather than requestAnimationFrame keeps
+            // this running while the tab is hidden or the window is covered.
+            if (this.pendingCheck !== null) return;
+            if (mutations.some(m => m.type === 'childList' || m.type === 'attributes')) {
+                this.pendingCheck = setTimeout(() => {
+                    this.pendingCheck = null;
                     this.checkForNewQuestion();
-                }
+                }, 0);
             }
         });
 
@@ -81,42 +251,53 @@ class KahootAgent {
 
             console.log(`New question detected (#${this.questionCount}):`, question);
 
+            // Only search once answer options are on screen, so lobby and
+            // scoreboard titles never leave the page, and skip questions the
+            // caches or knowledge base already answer. The search overlaps the
+            // settle delay below and its promise is handed to findAnswer
+            // directly, since the cache drops misses before they're used.
+            let prefetchedSearch = null;
+            const { answers } = this.extractAnswerOptions();
+            if (answers.length > 0 &&
+                !answerCache.has(answerCacheKey(question, answers)) &&
+                this.useBuiltInKnowledge(question, answers).confidence <= 0.8) {
+                prefetchedSearch = this.performWebSearch(this.cleanQuery(question));
+            } else {
+                this.warmConnections();
+            }
+
             // Small delay to ensure all elements are loaded
             setTimeout(() => {
-                this.findAnswer();
+                this.findAnswer(question, prefetchedSearch);
             }, 1000);
         }
     }
 
     extractQuestion() {
         // Try multiple selectors for different Kahoot layouts
-        const questionSelectors = [
-            '[data-functional-selector="block-title"]',
-            '[data-testid="question-title"]',
-            '.question-title',
-            '.question-text',
-            '[class*="question"]',
-            '[class*="title"]',
-            '[class*="block-title"]',
-            '[class*="Question"]',
-            'h1', 'h2', 'h3'
-        ];
-
-        for (let selector of questionSelectors) {
+        for (let selector of QUESTION_SELECTORS) {
             const element = document.querySelector(selector);
             if (element && element.textContent.trim()) {
                 const text = element.textContent.trim();
-                console.log(`Found element with selector "${selector}":`, text);
+                this.debugLog(`Found element with selector "${selector}":`, text);
                 // Filter out non-question text
                 if (text.length > 3 && !text.includes('Kahoot') && !text.includes('players')) {
-                    console.log('Question detected:', text);
+                    this.debugLog('Question detected:', text);
                     return text;
                 }
             }
         }
 
         // Fallback: Try to find any text that looks like a question
-        console.log('No question found with standard selectors, trying fallback...');
+        this.debugLog('No question found with standard selectors, trying fallback...');
+
+        // No element can contain the keywords unless the document does, so
+        // check once before reading textContent for every node on the page
+        const pageText = document.documentElement.textContent;
+        if (!pageText.includes('dinosaur') || !pageText.includes('means')) {
+            return null;
+        }
+
         const allElements = document.querySelectorAll('*');
         for (let element of allElements) {
             const text = element.textContent?.trim();
@@ -131,29 +312,21 @@ class KahootAgent {
 
     extractAnswerOptions() {
         // Try multiple selectors for answer options
-        const answerSelectors = [
-            '[data-functional-selector="answer-option"]',
-            '[data-testid="answer"]',
-            '.answer-option',
-            '.option-text',
-            '[class*="answer"]',
-            '[class*="option"]',
-            'button[class*="answer"]',
-            'button[class*="choice"]',
-            '[role="button"]'
-        ];
-
         const answers = [];
         const answerElements = [];
+        // Broad selectors match wrappers and their children with the same text;
+        // keep the first (outermost) element so each option is scored once
+        const seen = new Set();
 
-        for (let selector of answerSelectors) {
+        for (let selector of ANSWER_SELECTORS) {
             const elements = document.querySelectorAll(selector);
-            console.log(`Trying selector "${selector}": found ${elements.length} elements`);
+            this.debugLog(`Trying selector "${selector}": found ${elements.length} elements`);
             if (elements.length >= 2) {
                 elements.forEach(element => {
                     const text = element.textContent.trim();
-                    console.log(`Answer option found:`, text);
-                    if (text && text.length > 0) {
+                    this.debugLog(`Answer option found:`, text);
+                    if (text && text.length > 0 && !seen.has(text)) {
+                        seen.add(text);
                         answers.push(text);
                         answerElements.push(element);
                     }
@@ -164,14 +337,15 @@ class KahootAgent {
 
         // Fallback: Look for specific answer text we can see in the screenshot
         if (answers.length === 0) {
-            console.log('No answers found with standard selectors, trying fallback...');
+            this.debugLog('No answers found with standard selectors, trying fallback...');
             const answerTexts = ['large reptile', 'angry reptile', 'terrible lizard', 'ferocious animal'];
             const allButtons = document.querySelectorAll('button, div[role="button"], [tabindex="0"]');
 
             for (let button of allButtons) {
                 const text = button.textContent?.trim();
-                if (text && answerTexts.some(answer => text.includes(answer))) {
+                if (text && !seen.has(text) && answerTexts.some(answer => text.includes(answer))) {
                     console.log('Found answer via fallback:', text);
+                    seen.add(text);
                     answers.push(text);
                     answerElements.push(button);
                 }
@@ -181,10 +355,20 @@ class KahootAgent {
         return { answers, elements: answerElements };
     }
 
-    async findAnswer() {
+    async findAnswer(detectedQuestion = null, prefetchedSearch = null) {
         if (!this.isRunning) return;
 
+        // Read the question again after the settle delay so it is paired with
+        // the answers currently on screen
         const question = this.extractQuestion();
+
+        // The question seen at detection time was a transition title or has
+        // since been replaced; the newer text gets its own detection
+        if (detectedQuestion && question !== detectedQuestion) {
+            console.log('Question changed before answers settled, skipping:', detectedQuestion);
+            return;
+        }
+
         if (!question) {
             console.log('No question found on page');
             this.showNotification('No question found', 'warning');
@@ -204,7 +388,7 @@ class KahootAgent {
         this.showNotification(`Searching for: "${question}"`, 'info');
 
         try {
-            const result = await this.searchForAnswer(question, answers);
+            const result = await this.searchForAnswer(question, answers, prefetchedSearch);
 
             console.log('Search result:', result);
 
@@ -233,13 +417,43 @@ class KahootAgent {
         }
     }
 
-    async searchForAnswer(question, answers) {
+    async searchForAnswer(question, answers, prefetchedSearch = null) {
+        const key = answerCacheKey(question, answers);
+        const cached = answerCache.get(key);
+        if (cached) {
+            console.log('Using cached answer for:', question);
+            // Re-insert to mark as most recently used
+            answerCache.delete(key);
+            answerCache.set(key, cached);
+            return cached;
+        }
+
+        const result = await this.lookupAnswer(question, answers, prefetchedSearch);
+
+        // Only remember real answers so a failed lookup is retried next time
+        if (result.answer) {
+            answerCache.set(key, result);
+            if (answerCache.size > ANSWER_CACHE_SIZE) {
+                answerCache.delete(answerCache.keys().next().value);
+            }
+        }
+
+        return result;
+    }
+
+    async lookupAnswer(question, answers, prefetchedSearch = null) {
         console.log('Searching for answer to:', question);
         console.log('Available answers:', answers);
 
+        // Computed once per question and reused by every fallback below
+        let knowledgeResult = { answer: null, confidence: 0, source: 'none' };
+
+        // Lowercased options, index-aligned with answers, shared by both scorers
+        const lowerAnswers = answers.map(a => a.toLowerCase());
+
         try {
             // First try built-in knowledge base for quick answers
-            const knowledgeResult = this.useBuiltInKnowledge(question, answers);
+            knowledgeResult = this.useBuiltInKnowledge(question, answers, lowerAnswers);
             if (knowledgeResult.confidence > 0.8) {
                 console.log('Found high-confidence answer in knowledge base:', knowledgeResult);
                 return knowledgeResult;
@@ -250,11 +464,11 @@ class KahootAgent {
             console.log('Search query:', query);
 
             // Try web search methods
-            const searchResults = await this.performWebSearch(query);
+            const searchResults = await (prefetchedSearch || this.performWebSearch(query));
             console.log('Search results:', searchResults);
 
             // Score the answers based on search results
-            const scores = this.scoreAnswers(searchResults, answers);
+            const scores = this.scoreAnswers(searchResults, answers, lowerAnswers);
             console.log('Answer scores:', scores);
 
             // Find best answer
@@ -271,32 +485,66 @@ class KahootAgent {
 
         } catch (error) {
             console.error('Search error:', error);
-            // Always try knowledge base as last resort
-            return this.useBuiltInKnowledge(question, answers);
+            // Always fall back to the knowledge base result as last resort
+            return knowledgeResult;
         }
     }
 
     cleanQuery(question) {
         // Clean the question for better search results
         return question
-            .replace(/[?!.]+$/, '')
-            .replace(/^(what|which|who|where|when|how|why)\s+/i, '')
+            .replace(TRAILING_PUNCTUATION, '')
+            .replace(LEADING_QUESTION_WORD, '')
             .trim();
     }
 
-    async performWebSearch(query) {
+    performWebSearch(query) {
+        // Questions that differ only in case or spacing share one entry
+        const key = query.toLowerCase().replace(WHITESPACE_RUN, ' ').trim();
+
+        const cached = searchCache.get(key);
+        if (cached) {
+            // Re-insert to mark as most recently used
+            searchCache.delete(key);
+            searchCache.set(key, cached);
+            return cached;
+        }
+
+        const search = this.searchAllSources(query).then(results => {
+            // Don't remember misses; the APIs may answer next time
+            if (!results && searchCache.get(key) === search) {
+                searchCache.delete(key);
+            }
+            return results;
+        });
+
+        searchCache.set(key, search);
+        if (searchCache.size > SEARCH_CACHE_SIZE) {
+            searchCache.delete(searchCache.keys().next().value);
+        }
+
+        return search;
+    }
+
+    async searchAllSources(query) {
         // Try multiple search approaches
         try {
+            // Start both requests together so the fallback doesn't pay a
+            // second round trip; Wikipedia still takes priority
+            const wikiSearch = this.searchWikipedia(query);
+            const ddgSearch = this.searchDuckDuckGo(query);
+
             // Method 1: Wikipedia search
-            const wikiResults = await this.searchWikipedia(query);
+            const wikiResults = await wikiSearch;
             if (wikiResults) return wikiResults;
 
             // Method 2: Duck Duck Go search
-            const ddgResults = await this.searchDuckDuckGo(query);
+            const ddgResults = await ddgSearch;
             if (ddgResults) return ddgResults;
 
-            // Method 3: Fallback to built-in knowledge
-            return this.useBuiltInKnowledge(query);
+            // No web results; searchForAnswer already has the knowledge base
+            // result for this question and falls back to it
+            return '';
 
         } catch (error) {
             console.error('All search methods failed:', error);
@@ -307,7 +555,9 @@ class KahootAgent {
     async searchWikipedia(query) {
         try {
             const url = `https://en.wikipedia.org/api/rest_v1/page/summary/${encodeURIComponent(query)}`;
-            const response = await fetch(url);
+            const response = await fetch(url, { signal: AbortSignal.timeout(SEARCH_TIMEOUT_MS) });
+            // Most queries aren't exact article titles; skip parsing the 404 body
+            if (!response.ok) return null;
             const data = await response.json();
 
             if (data.extract) {
@@ -323,7 +573,8 @@ class KahootAgent {
         try {
             // DuckDuckGo instant answer API
             const url = `https://api.duckduckgo.com/?q=${encodeURIComponent(query)}&format=json&no_html=1&skip_disambig=1`;
-            const response = await fetch(url);
+            const response = await fetch(url, { signal: AbortSignal.timeout(SEARCH_TIMEOUT_MS) });
+            if (!response.ok) return null;
             const data = await response.json();
 
             if (data.Abstract) {
@@ -337,69 +588,13 @@ class KahootAgent {
         return null;
     }
 
-    useBuiltInKnowledge(question, answers) {
+    useBuiltInKnowledge(question, answers, lowerAnswers = answers.map(a => a.toLowerCase())) {
         console.log('Using built-in knowledge for:', question);
         
         const lowerQuestion = question.toLowerCase();
-        const lowerAnswers = answers.map(a => a.toLowerCase());
-        
-        // Enhanced knowledge base with question patterns and correct answers
-        const knowledgeBase = [
-            // Dinosaur questions
-            {
-                patterns: ['dinosaur means', 'word dinosaur'],
-                correctAnswer: 'terrible lizard',
-                confidence: 0.95,
-                explanation: 'Dinosaur comes from Greek meaning "terrible lizard"'
-            },
-            {
-                patterns: ['dinosaurs first appear', 'dinosaurs appear', 'period did dinosaurs'],
-                correctAnswer: 'triassic period',
-                confidence: 0.95,
-                explanation: 'Dinosaurs first appeared in the Triassic Period'
-            },
-            
-            // Geography
-            {
-                patterns: ['capital france', 'france capital'],
-                correctAnswer: 'paris',
-                confidence: 0.95
-            },
-            {
-                patterns: ['capital italy', 'italy capital'],
-                correctAnswer: 'rome',
-                confidence: 0.95
-            },
-            
-            // Math
-            {
-                patterns: ['2+2', 'two plus two'],
-                correctAnswer: 'four',
-                confidence: 0.95
-            },
-            {
-                patterns: ['3+3', 'three plus three'],
-                correctAnswer: 'six',
-                confidence: 0.95
-            },
-            
-            // Science
-            {
-                patterns: ['speed of light'],
-                correctAnswer: '299,792,458',
-                confidence: 0.9
-            },
-            
-            // History
-            {
-                patterns: ['world war 2', 'ww2', 'second world war'],
-                correctAnswer: '1939',
-                confidence: 0.9
-            }
-        ];
         
         // Try to find a match
-        for (let knowledge of knowledgeBase) {
+        for (let knowledge of KNOWLEDGE_BASE) {
             for (let pattern of knowledge.patterns) {
                 if (lowerQuestion.includes(pattern)) {
                     console.log(`Found pattern match: "${pattern}"`);
@@ -436,9 +631,9 @@ class KahootAgent {
     }
     
     calculateSimilarity(target, candidate) {
-        target = target.toLowerCase();
-        candidate = candidate.toLowerCase();
-        
+        // Both strings are expected to be lowercased already; the knowledge
+        // base is stored that way and callers lowercase options once up front
+
         // Exact match
         if (target === candidate) return 1.0;
         
@@ -459,12 +654,30 @@ class KahootAgent {
         return matches / Math.max(targetWords.length, candidateWords.length);
     }
 
-    scoreAnswers(searchResults, answers) {
+    scoreAnswers(searchResults, answers, lowerAnswers = answers.map(a => a.toLowerCase())) {
         const scores = {};
+
+        // Failed searches come back empty; nothing can match, so skip the scans
+        if (!searchResults) {
+            answers.forEach(answer => {
+                scores[answer] = 0;
+            });
+            return scores;
+        }
+
         const text = searchResults.toLowerCase();
 
-        answers.forEach(answer => {
-            const answerLower = answer.toLowerCase();
+        // Options often share words, so scan the text once per distinct word
+        const wordHits = new Map();
+        const mentions = (word) => {
+            if (!wordHits.has(word)) {
+                wordHits.set(word, text.includes(word));
+            }
+            return wordHits.get(word);
+        };
+
+        answers.forEach((answer, i) => {
+            const answerLower = lowerAnswers[i];
             let score = 0;
 
             // Direct mention
@@ -475,7 +688,7 @@ class KahootAgent {
             // Word-level matching
             const words = answerLower.split(' ');
             words.forEach(word => {
-                if (word.length > 2 && text.includes(word)) {
+                if (word.length > 2 && mentions(word)) {
                     score += 2;
                 }
             });
@@ -504,17 +717,30 @@ class KahootAgent {
     }
 
     clickAnswer(targetAnswer, elements, answers) {
-        const index = answers.findIndex(answer =>
-            answer.toLowerCase().includes(targetAnswer.toLowerCase()) ||
-            targetAnswer.toLowerCase().includes(answer.toLowerCase())
-        );
+        // The scorers return one of the option strings verbatim, so try an
+        // exact lookup before falling back to fuzzy containment
+        let index = answers.indexOf(targetAnswer);
+        if (index < 0) {
+            const targetLower = targetAnswer.toLowerCase();
+            index = answers.findIndex(answer => {
+                const answerLower = answer.toLowerCase();
+                return answerLower.includes(targetLower) || targetLower.includes(answerLower);
+            });
+        }
 
         if (index >= 0 && elements[index]) {
-            setTimeout(() => {
+            const click = () => {
                 elements[index].click();
                 this.showNotification(`Clicked: "${targetAnswer}"`, 'success');
                 console.log('Answer clicked:', targetAnswer);
-            }, 500);
+            };
+
+            // Kahoot scores by response time, so allow skipping the pause entirely
+            if (this.config.clickDelay > 0) {
+                setTimeout(click, this.config.clickDelay);
+            } else {
+                click();
+            }
         } else {
             console.log('Could not find element to click for:', targetAnswer);
         }
@@ -523,30 +749,8 @@ class KahootAgent {
     showNotification(message, type = 'info') {
         // Create notification element
         const notification = document.createElement('div');
-        notification.style.cssText = `
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            padding: 12px 20px;
-            border-radius: 8px;
-            color: white;
-            font-weight: bold;
-            z-index: 10000;
-            font-family: Arial, sans-serif;
-            font-size: 14px;
-            max-width: 300px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.3);
-            transition: all 0.3s ease;
-        `;
-
-        const colors = {
-            success: '#4CAF50',
-            error: '#f44336',
-            warning: '#ff9800',
-            info: '#2196F3'
-        };
-
-        notification.style.backgroundColor = colors[type] || colors.info;
+        notification.style.cssText = NOTIFICATION_STYLE;
+        notification.style.backgroundColor = NOTIFICATION_COLORS[type] || NOTIFICATION_COLORS.info;
         notification.textContent = message;
 
         document.body.appendChild(notification);
@@ -5,7 +5,9 @@ class KahootAgentPopup {
         this.isActive = false;
         this.autoClick = false;
         this.continuousMode = false;
+        this.debug = false;
         this.confidence = 70;
+        this.clickDelay = 500;
 
         this.initializeElements();
         this.bindEvents();
@@ -20,8 +22,11 @@ class KahootAgentPopup {
         this.status = document.getElementById('status');
         this.autoClickToggle = document.getElementById('autoClickToggle');
         this.continuousToggle = document.getElementById('continuousToggle');
+        this.debugToggle = document.getElementById('debugToggle');
         this.confidenceSlider = document.getElementById('confidenceSlider');
         this.confidenceValue = document.getElementById('confidenceValue');
+        this.clickDelaySlider = document.getElementById('clickDelaySlider');
+        this.clickDelayValue = document.getElementById('clickDelayValue');
     }
 
     bindEvents() {
@@ -52,9 +57,27 @@ class KahootAgentPopup {
             this.toggleContinuous();
         });
 
+        this.debugToggle.addEventListener('click', (e) => {
+            e.preventDefault();
+            this.toggleDebug();
+        });
+
         this.confidenceSlider.addEventListener('input', (e) => {
             this.confidence = e.target.value;
             this.confidenceValue.textContent = e.target.value + '%';
+        });
+
+        // Dragging fires an input event per step; persist once on release
+        this.confidenceSlider.addEventListener('change', () => {
+            this.saveSettings();
+        });
+
+        this.clickDelaySlider.addEventListener('input', (e) => {
+            this.clickDelay = Number(e.target.value);
+            this.clickDelayValue.textContent = e.target.value + ' ms';
+        });
+
+        this.clickDelaySlider.addEventListener('change', () => {
             this.saveSettings();
         });
 
@@ -95,7 +118,9 @@ class KahootAgentPopup {
                 args: [{
                     autoClick: this.autoClick,
                     continuous: this.continuousMode,
-                    confidence: this.confidence / 100
+                    confidence: this.confidence / 100,
+                    clickDelay: this.clickDelay,
+                    debug: this.debug
                 }]
             });
 
@@ -139,7 +164,9 @@ class KahootAgentPopup {
                 func: this.findSingleAnswer,
                 args: [{
                     autoClick: this.autoClick,
-                    confidence: this.confidence / 100
+                    confidence: this.confidence / 100,
+                    clickDelay: this.clickDelay,
+                    debug: this.debug
                 }]
             });
 
@@ -160,6 +187,12 @@ class KahootAgentPopup {
         this.saveSettings();
     }
 
+    toggleDebug() {
+        this.debug = !this.debug;
+        this.debugToggle.classList.toggle('active', this.debug);
+        this.saveSettings();
+    }
+
 
 
     updateUI() {
@@ -180,27 +213,40 @@ class KahootAgentPopup {
         chrome.storage.local.set({
             autoClick: this.autoClick,
             continuous: this.continuousMode,
-            confidence: this.confidence
+            confidence: this.confidence,
+            clickDelay: this.clickDelay,
+            debug: this.debug
         });
     }
 
     loadSettings() {
-        chrome.storage.local.get(['autoClick', 'continuous', 'confidence'], (result) => {
+        chrome.storage.local.get(['autoClick', 'continuous', 'confidence', 'clickDelay', 'debug'], (result) => {
             this.autoClick = result.autoClick || false;
             this.continuousMode = result.continuous || false;
+            this.debug = result.debug || false;
             this.confidence = result.confidence || 70;
+            // 0 is a valid delay, so only fall back when nothing is stored
+            this.clickDelay = result.clickDelay ?? 500;
 
             this.autoClickToggle.classList.toggle('active', this.autoClick);
             this.continuousToggle.classList.toggle('active', this.continuousMode);
+            this.debugToggle.classList.toggle('active', this.debug);
             this.confidenceSlider.value = this.confidence;
             this.confidenceValue.textContent = this.confidence + '%';
+            this.clickDelaySlider.value = this.clickDelay;
+            this.clickDelayValue.textContent = this.clickDelay + ' ms';
         });
     }
 
     // Function to inject into the page
     injectAgent(config) {
-        // Import the main agent code
-        if (!window.kahootAgent) {
+        // The manifest content script normally defines the class already;
+        // start right away instead of re-injecting and waiting for a load
+        if (!window.kahootAgent && window.KahootAgent) {
+            window.kahootAgent = new window.KahootAgent(config);
+            window.kahootAgent.start();
+        } else if (!window.kahootAgent) {
+            // Import the main agent code
             const script = document.createElement('script');
             script.src = chrome.runtime.getURL('content.js');
             document.head.appendChild(script);